@@ -1,12 +1,14 @@
 import sys
 import subprocess
-import tempfile
+import threading
 import base64
 import os
 
 MODEL_B64 = """<REPLACE_WITH_BASE64_MODEL>"""
 
 def ensure_dependencies():
+    if os.environ.get("DYNAMITE_BOT_NO_INSTALL"):
+        return
     try:
         import onnxruntime
         import numpy as np
@@ -25,13 +27,42 @@ def ensure_dependencies():
                 stderr=subprocess.DEVNULL
             )
 
-ensure_dependencies()
-import onnxruntime
-import numpy as np
+# Nothing heavy happens at import: numpy, onnxruntime and the decoded model are
+# loaded on the first move, or on a background thread right away when STARTUP is "warm".
+STARTUP = os.environ.get("DYNAMITE_BOT_STARTUP", "warm")
+np = None
+onnxruntime = None
+_session = None
+_session_lock = threading.Lock()
+_dependencies_checked = False
+_load_error = None
+
+
+def load_session():
+    global np, onnxruntime, _session, _dependencies_checked, _load_error
+    with _session_lock:
+        if _session is None and _load_error is None:
+            # Install at most once, and remember a failed load rather than spawning pip on every move.
+            if not _dependencies_checked:
+                _dependencies_checked = True
+                ensure_dependencies()
+            try:
+                import onnxruntime
+                import numpy as np
+                _session = onnxruntime.InferenceSession(base64.b64decode(MODEL_B64))
+            except Exception as error:
+                _load_error = error
+        if _load_error is not None:
+            raise _load_error
+    return _session
+
+
+def warm_session():
+    try:
+        load_session()
+    except Exception:
+        pass  # The error is stored and re-raised by make_move.
 
-model_path = tempfile.NamedTemporaryFile(delete=False, suffix=".onnx").name
-with open(model_path, "wb") as f:
-    f.write(base64.b64decode(MODEL_B64))
 
 MAX_DYNAMITE = 100
 MAX_ROLLOVER = 1000
@@ -42,11 +73,16 @@ MOVES = ['R', 'P', 'S', 'D', 'W']
 class PaperBot:
     def __init__(self, window_size=50):
         self.window_size = window_size
-        self.session = onnxruntime.InferenceSession(model_path)
-        self.history_input_name = self.session.get_inputs()[0].name
-        self.state_input_name = self.session.get_inputs()[1].name
+        self.session = None
+
+    def _ensure_session(self):
+        if self.session is None:
+            self.session = load_session()
+            self.history_input_name = self.session.get_inputs()[0].name
+            self.state_input_name = self.session.get_inputs()[1].name
 
     def make_move(self, gamestate):
+        self._ensure_session()
         rounds = gamestate.get('rounds', [])
         snapshots = self._generate_snapshots(rounds)
 
@@ -164,5 +200,5 @@ class PaperBot:
         }
 
 
-import atexit
-atexit.register(lambda: os.remove(model_path))
+if STARTUP == "warm":
+    threading.Thread(target=warm_session, daemon=True).start()
@@ -0,0 +1,22 @@
+from dataclasses import fields
+from pathlib import Path
+import orjson
+from typing import Dict
+
+from structures import Bot
+
+BOTS_CACHE = "bots.cache"
+
+
+def save_bot_cache(bots: Dict[int, Bot], filename: str):
+    records = {bot.id: [getattr(bot, field.name) for field in fields(Bot)] for bot in bots.values()}
+    with open(filename, "wb") as f:
+        f.write(orjson.dumps(records, option = orjson.OPT_NON_STR_KEYS))
+
+
+def load_bot_cache(filename: str) -> Dict[int, Bot]:
+    path = Path(filename)
+    if not path.exists():
+        return {}
+    records = orjson.loads(path.read_bytes())
+    return {int(bot_id): Bot(*record) for bot_id, record in records.items()}
@@ -0,0 +1,91 @@
+from collections import Counter
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from structures import Move
+
+MOVE_CODES = {move.value: i for i, move in enumerate(Move)}
+DIGEST_SIZE = 16
+DEDUP_INDEX = Path("history/dedup.idx")
+
+
+def pack_moves(moves: list[dict]) -> bytes:
+    return bytes(MOVE_CODES[move["p1"]] * len(MOVE_CODES) + MOVE_CODES[move["p2"]] for move in moves)
+
+
+def moves_digest(moves: list[dict]) -> str:
+    return hashlib.blake2b(pack_moves(moves), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def pair_of(key: str) -> Optional[Tuple[int, int]]:
+    # Random-match keys are `<bot1_id>-<bot2_id>` or `<bot1_id>-<bot2_id>-<copy>`.
+    parts = key.split("-")
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        return None
+    first, second = sorted(int(part) for part in parts[:2])
+    return first, second
+
+
+class DedupIndex:
+    def __init__(self, path: Path, max_pair_copies: Optional[int] = None):
+        if max_pair_copies is not None and max_pair_copies < 1:
+            raise ValueError(f"max_pair_copies must be at least 1, got {max_pair_copies}")
+        self.path = Path(path)
+        self.max_pair_copies = max_pair_copies
+        self.lock = threading.Lock()
+        self.keys_by_digest: Dict[str, str] = {}
+        self.known_keys = set()
+        self.pair_counts = Counter()
+        self.dropped_games = 0
+        self.dropped_rounds = 0
+
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                digest, key = line.split(" ", 1)
+                self._remember(digest, key)
+
+    def _remember(self, digest: str, key: str):
+        stored = self.keys_by_digest.setdefault(digest, key) == key
+        self.known_keys.add(key)
+        pair = pair_of(key)
+        if stored and pair is not None:
+            self.pair_counts[pair] += 1
+
+    def seen_key(self, key: str) -> bool:
+        with self.lock:
+            return key in self.known_keys
+
+    def pair_full(self, bot_one_id: int, bot_two_id: int) -> bool:
+        if self.max_pair_copies is None:
+            return False
+        with self.lock:
+            pair = (min(bot_one_id, bot_two_id), max(bot_one_id, bot_two_id))
+            return self.pair_counts[pair] >= self.max_pair_copies
+
+    def add(self, digest: str, key: str, rounds: int) -> bool:
+        with self.lock:
+            existing = self.keys_by_digest.get(digest)
+            if existing == key:
+                return True
+            if existing is not None:
+                self.dropped_games += 1
+                self.dropped_rounds += rounds
+                if key not in self.known_keys:
+                    self._append(digest, key)
+                return False
+            self._append(digest, key)
+            return True
+
+    def _append(self, digest: str, key: str):
+        self._remember(digest, key)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(f"{digest} {key}\n")
+
+    def report(self) -> str:
+        return (
+            f"[Dedup] {len(self.keys_by_digest)} unique games, "
+            f"dropped {self.dropped_games} duplicates ({self.dropped_rounds} rounds)."
+        )
@@ -1,8 +1,34 @@
 import sys
 import base64
+import json
+import os
+import subprocess
 from pathlib import Path
 
 PLACEHOLDER = "<REPLACE_WITH_BASE64_MODEL>"
+# Runs in a fresh interpreter so the import is a true cold start.
+MEASURE_SCRIPT = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("generated_bot", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+bot = module.PaperBot()
+time.sleep(float(sys.argv[2]))
+before_move = time.perf_counter()
+bot.make_move({"rounds": []})
+first_move = time.perf_counter()
+bot.make_move({"rounds": [{"p1": "R", "p2": "P"}]})
+second_move = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_move_ms": (first_move - before_move) * 1000,
+    "next_move_ms": (second_move - first_move) * 1000
+}))
+"""
+# Time the host is assumed to leave between import and the first move when warming on a thread.
+WARM_DELAY = 1.0
 
 def encode_onnx_to_py(onnx_path, template_path, output_py):
     onnx_path = Path(onnx_path)
@@ -33,9 +59,33 @@ def encode_onnx_to_py(onnx_path, template_path, output_py):
 
     print(f"Encoded {onnx_path} into {output_py}")
 
+def measure_startup(bot_py, warm_delay=WARM_DELAY):
+    timings = {}
+    for mode, delay in (("lazy", 0.0), ("warm", warm_delay)):
+        env = dict(os.environ, DYNAMITE_BOT_STARTUP=mode, DYNAMITE_BOT_NO_INSTALL="1")
+        result = subprocess.run(
+            [sys.executable, "-c", MEASURE_SCRIPT, str(bot_py), str(delay)],
+            capture_output=True,
+            text=True,
+            env=env
+        )
+        if result.returncode != 0:
+            print(f"Error: Could not measure {bot_py} in {mode} mode:\n{result.stderr.strip()}")
+            continue
+
+        timings[mode] = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"[{mode}, {delay:.1f}s before first move] "
+            f"Import: {timings[mode]['import_ms']:.1f} ms, "
+            f"first move: {timings[mode]['first_move_ms']:.1f} ms, "
+            f"next move: {timings[mode]['next_move_ms']:.1f} ms"
+        )
+    return timings
+
 if __name__ == "__main__":
     if len(sys.argv) != 4:
         print("Usage: python factory.py <model.onnx> <template.py> <output.py>")
         sys.exit(1)
 
     encode_onnx_to_py(sys.argv[1], sys.argv[2], sys.argv[3])
+    measure_startup(sys.argv[3])
@@ -1,18 +1,24 @@
 from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
 import joblib
 from pathlib import Path
 import numpy as np
 import orjson
 from tqdm import tqdm
+from typing import Dict, Optional, Tuple
 
-from structures import Game, GameSnapshot, Move, PlayerSnapshot
+from bots import BOTS_CACHE, load_bot_cache
+from dedup import DEDUP_INDEX, DedupIndex, moves_digest
+from metadata import METADATA_FILE, UNKNOWN_ID, save_metadata, shard_path
+from structures import Game, GameSnapshot, MatchSummary, Move, PlayerSnapshot
 
 MOVES = Move._member_map_.values()
 BATCH_SIZE = 1000
+# Keys the bot ids may appear under in a match JSON; the first pair present wins.
+BOT_ID_KEYS = [("botId1", "botId2"), ("bot1Id", "bot2Id"), ("bot1_id", "bot2_id")]
 
 
-def parse_json(json_path: Path) -> Game:
-    moves = orjson.loads(json_path.read_bytes())["moves"]
+def parse_moves(moves: list[dict]) -> Game:
     snapshots = []
     p1_counts = {m: 0.0 for m in MOVES}
     p2_counts = {m: 0.0 for m in MOVES}
@@ -58,25 +64,94 @@ def parse_json(json_path: Path) -> Game:
     return Game(moves=snapshots)
 
 
+def match_ids(json_path: Path, data: dict) -> Tuple[int, int, int]:
+    # History files are named `<match_id>.json`, random matches `<bot1_id>-<bot2_id>[-<copy>].json`.
+    match_id = bot_one_id = bot_two_id = UNKNOWN_ID
+    parts = json_path.stem.split("-")
+    if len(parts) == 1 and parts[0].isdigit():
+        match_id = int(parts[0])
+    elif len(parts) in (2, 3) and all(part.isdigit() for part in parts):
+        bot_one_id, bot_two_id = int(parts[0]), int(parts[1])
+
+    for first, second in BOT_ID_KEYS:
+        if data.get(first) is not None and data.get(second) is not None:
+            return match_id, int(data[first]), int(data[second])
+    bot_one, bot_two = data.get("bot1"), data.get("bot2")
+    if isinstance(bot_one, dict) and isinstance(bot_two, dict) and "id" in bot_one and "id" in bot_two:
+        return match_id, int(bot_one["id"]), int(bot_two["id"])
+    return match_id, bot_one_id, bot_two_id
+
+
+def summarise_moves(moves: list[dict], match_id: int, bot_one_id: int, bot_two_id: int) -> MatchSummary:
+    score_one = score_two = rollover = 0
+    dynamite_one = dynamite_two = 0
+
+    for move in moves:
+        p1, p2 = Move(move["p1"]), Move(move["p2"])
+        dynamite_one += int(p1 == Move.DYNAMITE)
+        dynamite_two += int(p2 == Move.DYNAMITE)
+        if p1.beats(p2):
+            score_one += 1 + rollover
+            rollover = 0
+        elif p2.beats(p1):
+            score_two += 1 + rollover
+            rollover = 0
+        else:
+            rollover += 1
+
+    return MatchSummary(
+        match_id = match_id,
+        bot_one_id = bot_one_id,
+        bot_two_id = bot_two_id,
+        bot_one_name = "",
+        bot_two_name = "",
+        score_one = score_one,
+        score_two = score_two,
+        winner = 1 if score_one > score_two else 2 if score_two > score_one else 0,
+        length = len(moves),
+        dynamite_one = dynamite_one,
+        dynamite_two = dynamite_two,
+        digest = moves_digest(moves)
+    )
+
+
+def parse_match(json_path: Path) -> Tuple[Game, MatchSummary]:
+    data = orjson.loads(json_path.read_bytes())
+    moves = data["moves"]
+    return parse_moves(moves), summarise_moves(moves, *match_ids(json_path, data))
+
+
 def save_snapshots_batch(snapshots: list[Game], out_dir: Path, batch_idx: int):
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / f"part-{batch_idx:04d}.dump"
+    out_file = shard_path(out_dir, batch_idx)
     joblib.dump(snapshots, out_file, compress=0)
 
 
-def process_directory(json_dir: Path, out_dir: Path, max_workers: int = None):
+def process_directory(json_dir: Path, out_dir: Path, max_workers: int = None,
+                      bot_names: Optional[Dict[int, str]] = None, dedup: Optional[DedupIndex] = None):
     all_json = sorted(json_dir.rglob("*.json"))
     total_files = len(all_json)
     batch = []
     batch_idx = 0
+    summaries = []
+    bot_names = bot_names or {}
 
     with ProcessPoolExecutor(max_workers = max_workers) as executor:
-        for game in tqdm(
-            executor.map(parse_json, all_json),
+        for json_path, (game, summary) in tqdm(
+            zip(all_json, executor.map(parse_match, all_json)),
             total=total_files,
             desc="Parsing JSON",
             unit="files"
         ):
+            if dedup and not dedup.add(summary.digest, json_path.stem, summary.length):
+                continue
+            summaries.append(replace(
+                summary,
+                bot_one_name = bot_names.get(summary.bot_one_id, ""),
+                bot_two_name = bot_names.get(summary.bot_two_id, ""),
+                shard = batch_idx,
+                offset = len(batch)
+            ))
             batch.append(game)
             if len(batch) == BATCH_SIZE:
                 save_snapshots_batch(batch, out_dir, batch_idx)
@@ -86,8 +161,13 @@ def process_directory(json_dir: Path, out_dir: Path, max_workers: int = None):
     if batch:
         save_snapshots_batch(batch, out_dir, batch_idx)
 
+    save_metadata(summaries, out_dir / METADATA_FILE)
+    if dedup:
+        print(dedup.report())
+
 
 if __name__ == "__main__":
     base_dir = Path("history/up-to-2000")
     output_dir = Path("dumps/up-to-2000")
-    process_directory(base_dir, output_dir, max_workers = 64)
+    bot_names = {bot_id: bot.name for bot_id, bot in load_bot_cache(BOTS_CACHE).items()}
+    process_directory(base_dir, output_dir, max_workers = 64, bot_names = bot_names, dedup = DedupIndex(DEDUP_INDEX))
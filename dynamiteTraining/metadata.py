@@ -0,0 +1,56 @@
+from dataclasses import fields
+import joblib
+from pathlib import Path
+import numpy as np
+from typing import Dict, Iterable, List
+
+from structures import Game, MatchSummary
+
+METADATA_FILE = "metadata.npz"
+UNKNOWN_ID = -1
+
+
+def shard_path(dump_dir: Path, shard: int) -> Path:
+    return dump_dir / f"part-{shard:04d}.dump"
+
+
+def save_metadata(summaries: List[MatchSummary], out_file: Path):
+    columns = {}
+    for field in fields(MatchSummary):
+        values = [getattr(summary, field.name) for summary in summaries]
+        dtype = np.str_ if field.type is str else np.int64
+        columns[field.name] = np.array(values, dtype=dtype)
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(out_file, **columns)
+
+
+def load_metadata(path: Path) -> Dict[str, np.ndarray]:
+    if path.is_dir():
+        path = path / METADATA_FILE
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def top_bots(metadata: Dict[str, np.ndarray], n: int) -> np.ndarray:
+    winner_ids = np.where(metadata["winner"] == 1, metadata["bot_one_id"], metadata["bot_two_id"])
+    winner_ids = winner_ids[(metadata["winner"] != 0) & (winner_ids != UNKNOWN_ID)]
+    ids, wins = np.unique(winner_ids, return_counts=True)
+    return ids[np.argsort(-wins, kind="stable")[:n]]
+
+
+def won_by(metadata: Dict[str, np.ndarray], bot_ids: Iterable[int]) -> np.ndarray:
+    bot_ids = np.asarray(list(bot_ids), dtype=np.int64)
+    return (
+        ((metadata["winner"] == 1) & np.isin(metadata["bot_one_id"], bot_ids)) |
+        ((metadata["winner"] == 2) & np.isin(metadata["bot_two_id"], bot_ids))
+    )
+
+
+def load_games(dump_dir: Path, metadata: Dict[str, np.ndarray], mask: np.ndarray) -> List[Game]:
+    shards = metadata["shard"][mask]
+    offsets = metadata["offset"][mask]
+    games = []
+    for shard in np.unique(shards):
+        shard_games = joblib.load(shard_path(dump_dir, int(shard)))
+        games.extend(shard_games[offset] for offset in offsets[shards == shard])
+    return games
@@ -2,18 +2,22 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import random
 from dataclasses import asdict
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
+from bots import BOTS_CACHE, load_bot_cache, save_bot_cache
 from config import EMAIL, PASSWORD
+from dedup import DEDUP_INDEX, DedupIndex, moves_digest
 from structures import Bot
 
 BASE_URL = "https://dynamite.softwire.com"
 MAX_RETRIES = 3
 BASE_RETRY = 1
+BOT_SYNC_THREADS = 8
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:140.0) Gecko/20100101 Firefox/140.0",
     "Content-Type": "application/json",
@@ -42,26 +46,67 @@ def login(email: str, password: str) -> str:
         raise ValueError("Login failed: no session cookie found")
     return session_id
 
-def fetch_all_bots(session_id: str) -> List[Bot]:
-    headers = HEADERS.copy()
-    headers.update({
+def bots_session(session_id: str, pool_size: int = BOT_SYNC_THREADS) -> requests.Session:
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    http.headers.update(HEADERS)
+    http.headers.update({
         "Referer": f"{BASE_URL}/bots",
         "Cookie": f"connect.sid={session_id}",
     })
-    bots = []
-    page = 1
-    while True:
-        params = {"page": page, "orderBy": "updatedAt", "direction": "DESC"}
-        response = requests.get(f"{BASE_URL}/bots", headers = headers, params = params)
-        response.raise_for_status()
-        data = response.json()
-        for bot_data in data.get("bots", []):
-            bot = Bot.from_dict(bot_data)
-            bots.append(bot)
-        if page >= data.get("totalPages", 1):
-            break
-        page += 1
-    return bots
+    return http
+
+def fetch_bots_page(http: requests.Session, page: int, base_url: str = BASE_URL) -> dict:
+    params = {"page": page, "orderBy": "updatedAt", "direction": "DESC"}
+    response = http.get(f"{base_url}/bots", params = params, timeout = 10)
+    response.raise_for_status()
+    return response.json()
+
+def fetch_bot_pages(http: requests.Session, pages: range, num_threads: int = BOT_SYNC_THREADS,
+                    base_url: str = BASE_URL) -> List[Bot]:
+    with ThreadPoolExecutor(max_workers = num_threads) as executor:
+        results = executor.map(lambda page: fetch_bots_page(http, page, base_url), pages)
+        return [Bot.from_dict(bot_data) for data in results for bot_data in data.get("bots", [])]
+
+def sync_bots(session_id: str, cache_file: str = BOTS_CACHE, num_threads: int = BOT_SYNC_THREADS,
+              base_url: str = BASE_URL) -> List[Bot]:
+    cached = load_bot_cache(cache_file)
+    fetched = {}
+
+    with bots_session(session_id, num_threads) as http:
+        page = 1
+        while True:
+            data = fetch_bots_page(http, page, base_url)
+            total_pages = data.get("totalPages", 1)
+            reached_cache = False
+            for bot_data in data.get("bots", []):
+                bot = Bot.from_dict(bot_data)
+                known = cached.get(bot.id)
+                if known is not None and known.updated_at == bot.updated_at:
+                    # Pages are ordered by updatedAt, so everything after this is unchanged too.
+                    reached_cache = True
+                    break
+                fetched[bot.id] = bot
+            page += 1
+            if reached_cache or page > total_pages or not cached:
+                break
+
+        if not cached:
+            for bot in fetch_bot_pages(http, range(page, total_pages + 1), num_threads, base_url):
+                fetched.setdefault(bot.id, bot)
+
+    print(f"[Bots] {len(fetched)} new or updated, {len(cached)} previously cached.")
+    cached.update(fetched)
+    save_bot_cache(cached, cache_file)
+    return sorted(cached.values(), key = lambda bot: bot.updated_at, reverse = True)
+
+def fetch_all_bots(session_id: str, base_url: str = BASE_URL) -> List[Bot]:
+    with bots_session(session_id) as http:
+        first = fetch_bots_page(http, 1, base_url)
+        rest = fetch_bot_pages(http, range(2, first.get("totalPages", 1) + 1), base_url = base_url)
+    return [Bot.from_dict(bot_data) for bot_data in first.get("bots", [])] + rest
 
 def save_bots_to_file(bots: List[Bot], filename: str):
     with open(filename, "w") as f:
@@ -83,23 +128,42 @@ def play_bots(session_id: str, bot_id1: int, bot_id2: int) -> dict:
     response.raise_for_status()
     return response.json()
 
-def run_random_matches(session_id: str, bots: List[Bot], output_dir: str, how_many: int = 10):
+def match_filename(output_dir: str, bot1: Bot, bot2: Bot, copy: int) -> Path:
+    # Repeat plays of a pairing get their own key so they can be counted against the pair cap.
+    suffix = f"-{copy}" if copy else ""
+    return Path(output_dir) / f"{bot1.id}-{bot2.id}{suffix}.json"
+
+def run_random_matches(session_id: str, bots: List[Bot], output_dir: str, how_many: int = 10,
+                       dedup: Optional[DedupIndex] = None):
     Path(output_dir).mkdir(parents = True, exist_ok = True)
+    copies = dedup.max_pair_copies if dedup and dedup.max_pair_copies is not None else 1
 
     for _ in range(how_many):
         bot1, bot2 = random.sample(bots, 2)
-        filename = Path(output_dir) / f"{bot1.id}-{bot2.id}.json"
-        if filename.exists():
-            print(f"Skipping existing match result: {filename}")
+        filename = next((
+            candidate for candidate in (match_filename(output_dir, bot1, bot2, copy) for copy in range(copies))
+            if not candidate.exists() and not (dedup and dedup.seen_key(candidate.stem))
+        ), None)
+        if filename is None:
+            print(f"Skipping {bot1.name} vs {bot2.name}, all {copies} match results already exist.")
+            continue
+        if dedup and dedup.pair_full(bot1.id, bot2.id):
+            print(f"Skipping {bot1.name} vs {bot2.name}, matchup already capped.")
             continue
         print(f"Playing {bot1.name} vs {bot2.name}")
         result = play_bots(session_id, bot1.id, bot2.id)
         with open(filename, "w") as f:
             json.dump(result, f, indent=4)
+        moves = result.get("moves", [])
+        if dedup and not dedup.add(moves_digest(moves), filename.stem, len(moves)):
+            filename.unlink()
+            print(f"Dropping duplicate match result: {filename}")
+            continue
         print(f"Saved match result to {filename}")
 
 
-def fetch_match_moves(session_id: str, match_id: int, output_dir: str, stop_event: threading.Event):
+def fetch_match_moves(session_id: str, match_id: int, output_dir: str, stop_event: threading.Event,
+                      dedup: Optional[DedupIndex] = None):
     if stop_event.is_set():
         return False
 
@@ -115,6 +179,9 @@ def fetch_match_moves(session_id: str, match_id: int, output_dir: str, stop_even
     if output_file.exists():
         print(f"Skipping match {match_id}, file already exists.")
         return True
+    if dedup and dedup.seen_key(str(match_id)):
+        print(f"Skipping match {match_id}, already indexed.")
+        return True
 
     attempts = 0
     while attempts < MAX_RETRIES:
@@ -127,9 +194,14 @@ def fetch_match_moves(session_id: str, match_id: int, output_dir: str, stop_even
 
             response.raise_for_status()
             data = response.json()
-
             with open(output_file, "w") as f:
                 json.dump(data, f, indent = 4)
+
+            moves = data.get("moves", [])
+            if dedup and not dedup.add(moves_digest(moves), str(match_id), len(moves)):
+                output_file.unlink()
+                print(f"Dropping match {match_id}, duplicate of an existing game.")
+                return True
             print(f"Saved moves for match {match_id} to {output_file}")
             return True
 
@@ -143,7 +215,8 @@ def fetch_match_moves(session_id: str, match_id: int, output_dir: str, stop_even
                 print(f"Failed to fetch match {match_id} after {MAX_RETRIES} attempts.")
                 return False
 
-def fetch_all_match_moves_parallel(session_id: str, output_dir: str, num_threads: int):
+def fetch_all_match_moves_parallel(session_id: str, output_dir: str, num_threads: int,
+                                   dedup: Optional[DedupIndex] = None):
     Path(output_dir).mkdir(parents = True, exist_ok = True)
     stop_event = threading.Event()
     match_id = 1
@@ -152,7 +225,7 @@ def fetch_all_match_moves_parallel(session_id: str, output_dir: str, num_threads
         futures = {}
         while not stop_event.is_set():
             for _ in range(num_threads):
-                future = executor.submit(fetch_match_moves, session_id, match_id, output_dir, stop_event)
+                future = executor.submit(fetch_match_moves, session_id, match_id, output_dir, stop_event, dedup)
                 futures[future] = match_id
                 match_id += 1
 
@@ -162,12 +235,13 @@ def fetch_all_match_moves_parallel(session_id: str, output_dir: str, num_threads
                 future.result()
             futures.clear()
 
+    if dedup:
+        print(dedup.report())
+
 
 if __name__ == "__main__":
     session = login(EMAIL, PASSWORD)
-    # bots = fetch_all_bots(session)
-    # save_bots_to_file(bots, bots_file)
-    # bots = load_bots_from_file(bots_file)
-    # run_random_matches(session, bots, matches_dir, 100)
-    fetch_all_match_moves_parallel(session, "history", num_threads = 32)
+    # bots = sync_bots(session)
+    # run_random_matches(session, bots, matches_dir, 100, dedup = DedupIndex(DEDUP_INDEX, max_pair_copies = 3))
+    fetch_all_match_moves_parallel(session, "history", num_threads = 32, dedup = DedupIndex(DEDUP_INDEX))
 
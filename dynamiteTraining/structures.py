@@ -16,15 +16,7 @@ class Move(Enum):
     WATER = 'W'
 
     def beats(self, other: 'Move') -> bool:
-        if self == other:
-            return False
-        return other in {
-            Move.ROCK: {Move.SCISSORS, Move.DYNAMITE},
-            Move.PAPER: {Move.ROCK, Move.DYNAMITE},
-            Move.SCISSORS: {Move.PAPER, Move.DYNAMITE},
-            Move.DYNAMITE: {Move.ROCK, Move.PAPER, Move.SCISSORS},
-            Move.WATER: {Move.DYNAMITE}
-        }[self]
+        return self in other.beaten_by()
 
     def beaten_by(self) -> Set['Move']:
         return {
@@ -92,3 +84,34 @@ class Bot:
     username: str
     created_at: str
     updated_at: str
+
+    @staticmethod
+    def from_dict(data: dict) -> 'Bot':
+        # Accepts both the API's camelCase records and our own snake_case dumps.
+        return Bot(
+            id = data["id"],
+            name = data["name"],
+            file_type = data.get("fileType", data.get("file_type")),
+            user_id = data.get("userId", data.get("user_id")),
+            username = data["username"],
+            created_at = data.get("createdAt", data.get("created_at")),
+            updated_at = data.get("updatedAt", data.get("updated_at"))
+        )
+
+
+@dataclass(frozen=True)
+class MatchSummary:
+    match_id: int
+    bot_one_id: int
+    bot_two_id: int
+    bot_one_name: str
+    bot_two_name: str
+    score_one: int
+    score_two: int
+    winner: int
+    length: int
+    dynamite_one: int
+    dynamite_two: int
+    digest: str
+    shard: int = -1
+    offset: int = -1
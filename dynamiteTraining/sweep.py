@@ -0,0 +1,227 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+from dataclasses import asdict, dataclass
+import itertools
+import joblib
+import multiprocessing
+import os
+import torch
+import torch.nn as nn
+from torch.utils.data import Dataset, DataLoader
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from structures import MAX_DYNAMITE, MAX_ROLLOVER, Game, GameSnapshot
+from train import FEATURE_SIZE, NUM_CLASSES, STATE_SIZE, DynamiteTransformerNet, make_optimizer, train_epoch
+
+DEVICE = torch.device("cpu")
+VAL_FRACTION = 0.1
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    window_size: int = 50
+    batch_size: int = 128
+    lr: float = 1e-3
+    embedding_dim: int = 32
+
+    def name(self) -> str:
+        return f"w{self.window_size}-b{self.batch_size}-lr{self.lr:g}-e{self.embedding_dim}"
+
+
+def featurize(snapshots: List[GameSnapshot], feature_dir: Path):
+    features = np.stack([
+        np.concatenate([
+            snap.player_one.aggregate(snap.rollover),
+            snap.player_two.aggregate(snap.rollover)
+        ]) for snap in snapshots
+    ]).astype(np.float32)
+    states = np.array([
+        [
+            snap.player_one.dynamite_left / MAX_DYNAMITE,
+            snap.player_two.dynamite_left / MAX_DYNAMITE,
+            snap.rollover / MAX_ROLLOVER
+        ] for snap in snapshots
+    ], dtype=np.float32)
+    labels = np.array([snap.player_one.move.index() for snap in snapshots], dtype=np.int64)
+
+    feature_dir.mkdir(parents=True, exist_ok=True)
+    np.save(feature_dir / "features.npy", features)
+    np.save(feature_dir / "states.npy", states)
+    np.save(feature_dir / "labels.npy", labels)
+
+
+def load_features(feature_dir: Path) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Memory-mapped, so every worker reads the same pages from the OS cache instead of its own copy.
+    return tuple(
+        np.load(feature_dir / f"{name}.npy", mmap_mode="r")
+        for name in ("features", "states", "labels")
+    )
+
+
+class WindowDataset(Dataset):
+    def __init__(self, features, states, labels, window_size, indices):
+        self.features = features
+        self.states = states
+        self.labels = labels
+        self.window_size = window_size
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        idx = int(self.indices[i])
+        end = idx + self.window_size
+        hist = torch.from_numpy(np.array(self.features[idx:end]))
+        state = torch.from_numpy(np.array(self.states[end]))
+        label = torch.tensor(self.labels[end], dtype=torch.long)
+        return hist, state, label
+
+
+def split_indices(total: int, window_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    # The cut is over label positions and ignores the window size, so every config is validated
+    # on the same held-out labels and val_loss stays comparable across window sizes.
+    cut = int(total * (1 - VAL_FRACTION))
+    label_positions = np.arange(window_size, total)
+    train_labels = label_positions[label_positions < cut]
+    val_labels = label_positions[label_positions >= cut]
+    return train_labels - window_size, val_labels - window_size
+
+
+def pin_worker(cores: multiprocessing.Queue, threads: int):
+    torch.set_num_threads(threads)
+    core_set = cores.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, core_set)
+
+
+def evaluate(model: nn.Module, loader: DataLoader, criterion: nn.Module) -> float:
+    model.eval()
+    total_loss = 0.0
+    with torch.no_grad():
+        for hist_batch, state_batch, label_batch in loader:
+            outputs = model(hist_batch.to(DEVICE), state_batch.to(DEVICE))
+            total_loss += criterion(outputs, label_batch.to(DEVICE)).item()
+    return total_loss / max(len(loader), 1)
+
+
+def run_trial(trial: int, config: SweepConfig, target_epochs: int, max_epochs: int,
+              feature_dir: Path, checkpoint_dir: Path) -> Tuple[int, int, float, float]:
+    features, states, labels = load_features(feature_dir)
+    train_idx, val_idx = split_indices(len(labels), config.window_size)
+    train_loader = DataLoader(
+        WindowDataset(features, states, labels, config.window_size, train_idx),
+        batch_size=config.batch_size,
+        shuffle=True
+    )
+    val_loader = DataLoader(
+        WindowDataset(features, states, labels, config.window_size, val_idx),
+        batch_size=config.batch_size
+    )
+
+    model = DynamiteTransformerNet(FEATURE_SIZE, STATE_SIZE, NUM_CLASSES, config.embedding_dim).to(DEVICE)
+    criterion = nn.CrossEntropyLoss()
+    optimizer, scheduler = make_optimizer(model, config.lr, max_epochs)
+
+    # Survivors of a rung resume from where they stopped rather than retraining from scratch.
+    checkpoint_path = checkpoint_dir / f"{config.name()}.pth"
+    epoch = 0
+    if checkpoint_path.exists():
+        checkpoint = torch.load(checkpoint_path)
+        model.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        scheduler.load_state_dict(checkpoint["scheduler"])
+        epoch = checkpoint["epoch"]
+
+    train_loss = float('nan')
+    while epoch < target_epochs:
+        train_loss = train_epoch(model, train_loader, criterion, optimizer, DEVICE)
+        scheduler.step()
+        epoch += 1
+
+    val_loss = evaluate(model, val_loader, criterion)
+    torch.save({
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "scheduler": scheduler.state_dict(),
+        "epoch": epoch
+    }, checkpoint_path)
+    return trial, epoch, train_loss, val_loss
+
+
+def successive_halving(
+    configs: List[SweepConfig],
+    feature_dir: Path,
+    out_dir: Path,
+    min_epochs: int = 1,
+    max_epochs: int = 8,
+    eta: int = 2,
+    workers: Optional[int] = None,
+    threads_per_worker: int = 1
+) -> List[dict]:
+    cpus = os.cpu_count() or 1
+    workers = workers or max(cpus // threads_per_worker, 1)
+    checkpoint_dir = out_dir / "checkpoints"
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    for stale in checkpoint_dir.glob("*.pth"):
+        stale.unlink()
+
+    context = multiprocessing.get_context("spawn")
+    cores = context.Queue()
+    for worker in range(workers):
+        start = (worker * threads_per_worker) % cpus
+        cores.put({(start + t) % cpus for t in range(threads_per_worker)})
+
+    results = [{**asdict(config), "epochs": 0, "train_loss": float('nan'), "val_loss": float('inf')}
+               for config in configs]
+    survivors = list(range(len(configs)))
+    epochs = min_epochs
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=pin_worker,
+        initargs=(cores, threads_per_worker)
+    ) as executor:
+        while True:
+            futures = [
+                executor.submit(run_trial, trial, configs[trial], epochs, max_epochs, feature_dir, checkpoint_dir)
+                for trial in survivors
+            ]
+            for future in as_completed(futures):
+                trial, trained, train_loss, val_loss = future.result()
+                results[trial].update(epochs=trained, train_loss=train_loss, val_loss=val_loss)
+                print(f"[Sweep] {configs[trial].name()} epochs={trained} val_loss={val_loss:.4f}")
+
+            if len(survivors) == 1 or epochs >= max_epochs:
+                break
+            survivors = sorted(survivors, key=lambda trial: results[trial]["val_loss"])
+            survivors = survivors[:max(len(survivors) // eta, 1)]
+            epochs = min(epochs * eta, max_epochs)
+
+    results.sort(key=lambda row: (-row["epochs"], row["val_loss"]))
+    with open(out_dir / "sweep.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+    return results
+
+
+if __name__ == "__main__":
+    base_dir = Path("dumps")
+    feature_dir = base_dir / "above-2000-features"
+    output_dir = Path("models/sweep")
+
+    if not (feature_dir / "labels.npy").exists():
+        games: List[Game] = joblib.load(base_dir / "above-2000.dump")
+        featurize([snap for game in games for snap in game.moves], feature_dir)
+
+    configs = [
+        SweepConfig(window_size=window_size, lr=lr, embedding_dim=embedding_dim)
+        for window_size, lr, embedding_dim in itertools.product([25, 50, 100], [1e-3, 3e-4], [16, 32, 64])
+    ]
+    results = successive_halving(configs, feature_dir, output_dir, max_epochs=10, threads_per_worker=2)
+    for row in results:
+        print(row)
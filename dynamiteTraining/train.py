@@ -5,7 +5,7 @@ import torch.optim as optim
 from torch.utils.data import Dataset, DataLoader
 import numpy as np
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from tqdm import tqdm
 
 from structures import MAX_DYNAMITE, MAX_ROLLOVER, Game, GameSnapshot, Move
@@ -21,9 +21,9 @@ DUMMY_STATE = torch.randn(BATCH_SIZE, STATE_SIZE).to(DEVICE)
 
 
 class DynamiteTransformerNet(nn.Module):
-    def __init__(self, feature_size: int, state_size: int, num_classes: int) -> None:
+    def __init__(self, feature_size: int, state_size: int, num_classes: int, embedding_dim: int = 32) -> None:
         super().__init__()
-        self.embedding_dim = 32
+        self.embedding_dim = embedding_dim
 
         encoder_layer = nn.TransformerEncoderLayer(
             d_model=self.embedding_dim,
@@ -89,6 +89,42 @@ class DynamiteDataset(Dataset):
         return hist, state, label
 
 
+def make_optimizer(model: nn.Module, lr: float, epochs: int):
+    optimizer = optim.AdamW(model.parameters(), lr=lr, weight_decay=1e-2)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=epochs)
+    return optimizer, scheduler
+
+
+def train_epoch(
+    model: nn.Module,
+    loader: DataLoader,
+    criterion: nn.Module,
+    optimizer: optim.Optimizer,
+    device: torch.device = DEVICE,
+    desc: Optional[str] = None
+) -> float:
+    model.train()
+    total_loss = 0.0
+
+    for hist_batch, state_batch, label_batch in tqdm(loader, desc=desc, disable=desc is None):
+        hist_batch = hist_batch.to(device, non_blocking=True)
+        state_batch = state_batch.to(device, non_blocking=True)
+        label_batch = label_batch.to(device, non_blocking=True)
+
+        optimizer.zero_grad()
+
+        outputs = model(hist_batch, state_batch)
+        loss = criterion(outputs, label_batch)
+
+        loss.backward()
+        torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+        optimizer.step()
+
+        total_loss += loss.item()
+
+    return total_loss / max(len(loader), 1)
+
+
 def train_model(
     snapshots: List[GameSnapshot],
     path: str,
@@ -98,12 +134,12 @@ def train_model(
     num_classes: int = NUM_CLASSES,
     epochs: int = 10,
     batch_size: int = BATCH_SIZE,
-    lr: float = 1e-3
+    lr: float = 1e-3,
+    embedding_dim: int = 32
 ) -> DynamiteTransformerNet:
-    model = DynamiteTransformerNet(feature_size, state_size, num_classes).to(DEVICE)
+    model = DynamiteTransformerNet(feature_size, state_size, num_classes, embedding_dim).to(DEVICE)
     criterion = nn.CrossEntropyLoss()
-    optimizer = optim.AdamW(model.parameters(), lr=lr, weight_decay=1e-2)
-    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=epochs)
+    optimizer, scheduler = make_optimizer(model, lr, epochs)
 
     dataset = DynamiteDataset(snapshots, window_size)
     loader = DataLoader(dataset, batch_size=batch_size, shuffle=True, num_workers=4)
@@ -111,28 +147,9 @@ def train_model(
     best_loss = float('inf')
 
     for epoch in range(epochs):
-        model.train()
-        total_loss = 0.0
-
-        for hist_batch, state_batch, label_batch in tqdm(loader, desc=f"Epoch {epoch + 1}/{epochs}"):
-            hist_batch = hist_batch.to(DEVICE, non_blocking=True)
-            state_batch = state_batch.to(DEVICE, non_blocking=True)
-            label_batch = label_batch.to(DEVICE, non_blocking=True)
-
-            optimizer.zero_grad()
-
-            outputs = model(hist_batch, state_batch)
-            loss = criterion(outputs, label_batch)
-
-            loss.backward()
-            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
-            optimizer.step()
-
-            total_loss += loss.item()
-
+        avg_loss = train_epoch(model, loader, criterion, optimizer, desc=f"Epoch {epoch + 1}/{epochs}")
         scheduler.step()
 
-        avg_loss = total_loss / len(loader)
         print(f"Epoch [{epoch + 1}/{epochs}] Loss: {avg_loss:.4f}")
 
 
@@ -173,5 +190,6 @@ if __name__ == "__main__":
         num_classes=NUM_CLASSES,
         epochs=10,
         batch_size=BATCH_SIZE,
-        lr=1e-3
+        lr=1e-3,
+        embedding_dim=32
     )